@@ -13,7 +13,7 @@ from flask_cors import CORS
 import pickle
 import base64
 import time
-from collections import deque, Counter
+import threading
 import logging
 
 # Configure logging
@@ -30,8 +30,8 @@ class SignLanguageClassifier:
     def __init__(self):
         from sklearn.ensemble import RandomForestClassifier
         self.model = RandomForestClassifier(
-            n_estimators=200,  
-            max_depth=15,      
+            n_estimators=50,  # Normalized features need a much smaller forest
+            max_depth=8,      
             min_samples_split=5,
             min_samples_leaf=2,
             random_state=42,
@@ -39,24 +39,84 @@ class SignLanguageClassifier:
         )
         self.label_to_idx = {}
         self.idx_to_label = {}
+        self._idx_to_label_arr = np.empty(0, dtype=object)
+        self.normalize_features = True  # Older pickles were trained on raw coordinates
+        self._trees = None  # Fitted forest trees for the fast predict path
+        self._sess = None  # Optional ONNX Runtime session (see load_onnx)
         
+    @staticmethod
+    def _normalize(X):
+        """EXACT copy from sign_translator.py"""
+        points = X.reshape(-1, 21, 3)
+        points = points - points[:, 0:1, :]  # Wrist (landmark 0) at the origin
+        scale = np.linalg.norm(points[:, 9], axis=1)  # Wrist -> middle finger MCP
+        return (points / np.maximum(scale, 1e-6)[:, None, None]).reshape(-1, 63)
+    
+    def predict_batch(self, X):
+        """EXACT copy from sign_translator.py"""
+        X = np.asarray(X, dtype=np.float32).reshape(-1, 63)
+        if self.normalize_features:
+            X = self._normalize(X)
+        if self._sess is not None:
+            # float64 like scikit-learn, np.float32 confidences are not JSON serializable
+            return self._sess.run([self._proba_output], {self._input_name: X})[0].astype(np.float64)
+        if self._trees is not None:
+            # Average per-tree probabilities, skipping the forest's per-call input validation
+            proba = self._trees[0].predict_proba(X, check_input=False)
+            for tree in self._trees[1:]:
+                proba += tree.predict_proba(X, check_input=False)
+            return proba / len(self._trees)
+        return self.model.predict_proba(X)
+    
+    def _prepare_for_inference(self):
+        """EXACT copy from sign_translator.py"""
+        from sklearn.ensemble import RandomForestClassifier
+        self.model.n_jobs = 1  # Thread dispatch costs more than it saves on one row
+        self._trees = self.model.estimators_ if isinstance(self.model, RandomForestClassifier) else None
+    
+    def _predict_proba(self, landmarks):
+        """EXACT copy from sign_translator.py"""
+        return self.predict_batch(landmarks)[0]
+    
     def predict(self, landmarks):
         """EXACT copy from sign_translator.py"""
-        proba = self.model.predict_proba([landmarks])[0]
+        proba = self._predict_proba(landmarks)
         class_idx = np.argmax(proba)
         confidence = proba[class_idx]
         return self.idx_to_label[class_idx], confidence
     
     def predict_top_k(self, landmarks, k=3):
         """EXACT copy from sign_translator.py"""
-        proba = self.model.predict_proba([landmarks])[0]
-        top_indices = np.argsort(proba)[::-1][:k]
-        
-        predictions = []
-        for idx in top_indices:
-            predictions.append((self.idx_to_label[idx], proba[idx]))
+        return self._top_k_from_proba(self._predict_proba(landmarks), k)
+    
+    def predict_with_top_k(self, landmarks, k=3):
+        """EXACT copy from sign_translator.py"""
+        top_predictions = self._top_k_from_proba(self._predict_proba(landmarks), k)
+        return top_predictions[0], top_predictions
+    
+    def _top_k_from_proba(self, proba, k):
+        """EXACT copy from sign_translator.py"""
+        k = min(k, len(proba))
+        top_indices = np.argpartition(proba, -k)[-k:]
+        top_indices = top_indices[np.argsort(-proba[top_indices])]
+        return list(zip(self._idx_to_label_arr[top_indices], proba[top_indices]))
+    
+    def _refresh_label_lookup(self):
+        """EXACT copy from sign_translator.py"""
+        self._idx_to_label_arr = np.array(
+            [self.idx_to_label[i] for i in range(len(self.idx_to_label))], dtype=object)
+    
+    def load_onnx(self, filename):
+        """EXACT copy from sign_translator.py"""
+        import onnxruntime as ort
         
-        return predictions
+        sess_options = ort.SessionOptions()
+        sess_options.intra_op_num_threads = 1  # Single frame, small model
+        self._sess = ort.InferenceSession(
+            filename, sess_options=sess_options, providers=['CPUExecutionProvider'])
+        self._input_name = self._sess.get_inputs()[0].name
+        self._proba_output = self._sess.get_outputs()[1].name  # [label, probabilities]
+        print(f"⚡ ONNX Runtime inference enabled from {filename}")
 
 class SignLanguageRecognizer:
     """EXACT copy from sign_translator.py - simplified for API"""
@@ -73,28 +133,68 @@ class SignLanguageRecognizer:
         )
         self.mp_drawing = mp.solutions.drawing_utils
         
-        # EXACT SAME smoothing logic
-        self.prediction_history = deque(maxlen=20)
-        self.recognized_text = []
+        # EXACT SAME smoothing window as a ring of confident class indices
+        # (-1 = empty or below threshold) plus a rolling per-class vote count
+        self.hist_idx = np.full(20, -1, np.int16)
+        self._vote_counts = np.zeros(len(classifier.idx_to_label), np.int32)
+        self.hist_pos = 0
+        self.hist_count = 0
+        self.recognized_text = []  # Full transcript, only read by /api/get-recognized-text
         self.last_sign = None
-        self.last_sign_time = time.time()
+        self.last_sign_time = time.perf_counter()
         self.confidence_threshold = 0.7  # EXACT SAME
         
+        # Downscale wide frames before MediaPipe (its hand model runs at 224x224)
+        self._target_w = 640
+        self._resize_buf = None
+        self._rgb_buf = None  # Reused BGR->RGB conversion target
+        self._landmark_buf = np.empty(63, dtype=np.float32)  # Overwritten every frame
+        # Flask serves requests on several threads, but the buffers above, the
+        # MediaPipe graph and the smoothing state all belong to one frame at a time
+        self.lock = threading.Lock()
+        
+    def clear_history(self):
+        """Reset the smoothing ring buffer and vote counts"""
+        self.hist_idx.fill(-1)
+        self._vote_counts.fill(0)
+        self.hist_pos = 0
+        self.hist_count = 0
+    
     def extract_landmarks(self, image):
-        """EXACT copy from sign_translator.py"""
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(image_rgb)
+        """Inlined _downscale + _landmarks_from_rgb, the returned array is reused - don't keep it"""
+        if image.shape[1] > self._target_w:
+            scale = self._target_w / image.shape[1]
+            size = (self._target_w, int(image.shape[0] * scale))
+            if self._resize_buf is None or self._resize_buf.shape[:2] != (size[1], size[0]):
+                self._resize_buf = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            # Landmarks are normalized [0, 1], so no rescaling is needed afterwards
+            image = cv2.resize(image, size, dst=self._resize_buf, interpolation=cv2.INTER_AREA)
+        if self._rgb_buf is None or self._rgb_buf.shape != image.shape:
+            self._rgb_buf = np.empty(image.shape, dtype=np.uint8)
+        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=self._rgb_buf)
+        image_rgb.flags.writeable = False  # Lets MediaPipe skip its internal copy
+        try:
+            results = self.hands.process(image_rgb)
+        finally:
+            image_rgb.flags.writeable = True  # Buffer is reused for the next frame
         
         if results.multi_hand_landmarks:
             landmarks = results.multi_hand_landmarks[0]
-            landmark_list = []
-            for lm in landmarks.landmark:
-                landmark_list.extend([lm.x, lm.y, lm.z])
-            return landmark_list, landmarks
+            landmark_arr = self._landmark_buf  # Read-only for callers, reused next frame
+            for i, lm in enumerate(landmarks.landmark):
+                landmark_arr[3*i] = lm.x
+                landmark_arr[3*i+1] = lm.y
+                landmark_arr[3*i+2] = lm.z
+            return landmark_arr, landmarks
         return None, None
     
     def process_single_frame(self, frame):
         """SIMPLIFIED version of sign_translator.py recognition logic"""
+        with self.lock:
+            return self._process_single_frame(frame)
+    
+    def _process_single_frame(self, frame):
+        """Recognize one frame, caller holds self.lock"""
         # EXACT same landmark extraction
         landmarks, landmarks_visual = self.extract_landmarks(frame)
         
@@ -109,37 +209,42 @@ class SignLanguageRecognizer:
             result['hand_detected'] = True
             
             # EXACT same prediction logic
-            sign, confidence = self.classifier.predict(landmarks)
-            top_predictions = self.classifier.predict_top_k(landmarks, k=3)
+            (sign, confidence), top_predictions = self.classifier.predict_with_top_k(landmarks, k=3)
             
             # EXACT same smoothing logic from sign_translator.py
-            self.prediction_history.append((sign, confidence))
+            evicted = self.hist_idx[self.hist_pos]
+            if evicted >= 0:
+                self._vote_counts[evicted] -= 1
+            if confidence > self.confidence_threshold:
+                idx = self.classifier.label_to_idx[sign]
+                self.hist_idx[self.hist_pos] = idx
+                self._vote_counts[idx] += 1
+            else:
+                self.hist_idx[self.hist_pos] = -1
+            self.hist_pos = (self.hist_pos + 1) % len(self.hist_idx)
+            self.hist_count += 1
             
-            # Smooth predictions - EXACT same logic
-            if len(self.prediction_history) >= 10:
-                recent = [(s, c) for s, c in self.prediction_history 
-                         if c > self.confidence_threshold]
-                if recent:
-                    signs = [s for s, c in recent]
-                    most_common = Counter(signs).most_common(1)
-                    if most_common and len(most_common[0]) > 0:
-                        detected_sign = most_common[0][0]
+            # Smooth predictions - mode of confident entries from the rolling counts
+            if self.hist_count >= 10:
+                if self._vote_counts.any():
+                    detected_idx = int(self._vote_counts.argmax())
+                    detected_sign = self.classifier.idx_to_label[detected_idx]
+                    
+                    # EXACT same temporal filtering
+                    current_time = time.perf_counter()
+                    if (detected_sign != self.last_sign and 
+                        current_time - self.last_sign_time > 1.8):  # EXACT SAME 1.8s
+                        self.recognized_text.append(detected_sign)
+                        self.last_sign = detected_sign
+                        self.last_sign_time = current_time
                         
-                        # EXACT same temporal filtering
-                        current_time = time.time()
-                        if (detected_sign != self.last_sign and 
-                            current_time - self.last_sign_time > 1.8):  # EXACT SAME 1.8s
-                            self.recognized_text.append(detected_sign)
-                            self.last_sign = detected_sign
-                            self.last_sign_time = current_time
-                            
-                            result['sign'] = detected_sign
-                            result['confidence'] = confidence
-                            result['new_sign_added'] = True
-                        elif detected_sign == self.last_sign:
-                            result['sign'] = detected_sign
-                            result['confidence'] = confidence
-                            result['new_sign_added'] = False
+                        result['sign'] = detected_sign
+                        result['confidence'] = confidence
+                        result['new_sign_added'] = True
+                    elif detected_sign == self.last_sign:
+                        result['sign'] = detected_sign
+                        result['confidence'] = confidence
+                        result['new_sign_added'] = False
             
             # Always return top predictions for debugging
             result['top_predictions'] = [{'sign': s, 'confidence': float(c)} for s, c in top_predictions]
@@ -177,9 +282,21 @@ def initialize_recognizer():
                 classifier.model = model_data['model']
                 classifier.label_to_idx = model_data['label_to_idx']
                 classifier.idx_to_label = model_data['idx_to_label']
+                classifier._refresh_label_lookup()
+                classifier.normalize_features = model_data.get('normalize_features', False)
+                classifier._prepare_for_inference()
                 
                 print(f"✅ Loaded with {len(classifier.idx_to_label)} signs")
                 
+                # Use the ONNX export only if it is at least as new as the pickle
+                onnx_file = os.path.splitext(model_file)[0] + '.onnx'
+                if (os.path.exists(onnx_file) and
+                        os.path.getmtime(onnx_file) >= os.path.getmtime(model_file)):
+                    try:
+                        classifier.load_onnx(onnx_file)
+                    except ImportError:
+                        print("💡 onnxruntime not installed, using scikit-learn inference")
+                
                 # Create recognizer exactly like sign_translator.py
                 recognizer = SignLanguageRecognizer(classifier)
                 print("✅ OPTIMIZED recognizer initialized!")
@@ -279,10 +396,12 @@ def get_recognized_text():
     if recognizer is None:
         return jsonify({'error': 'Recognizer not initialized', 'success': False}), 500
     
+    with recognizer.lock:
+        words = list(recognizer.recognized_text)
     return jsonify({
-        'recognized_text': recognizer.recognized_text,
-        'full_text': ' '.join(recognizer.recognized_text),
-        'word_count': len(recognizer.recognized_text),
+        'recognized_text': words,
+        'full_text': ' '.join(words),
+        'word_count': len(words),
         'success': True
     })
 
@@ -292,10 +411,11 @@ def clear_recognized_text():
     if recognizer is None:
         return jsonify({'error': 'Recognizer not initialized', 'success': False}), 500
     
-    recognizer.recognized_text.clear()
-    recognizer.prediction_history.clear()
-    recognizer.last_sign = None
-    recognizer.last_sign_time = time.time()
+    with recognizer.lock:
+        recognizer.recognized_text.clear()
+        recognizer.clear_history()
+        recognizer.last_sign = None
+        recognizer.last_sign_time = time.perf_counter()
     
     return jsonify({
         'message': 'Text cleared',
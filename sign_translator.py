@@ -12,105 +12,320 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
 import pickle
 import time
-from collections import deque, Counter
+from collections import deque
 import os
+import sys
+import signal
 import asyncio
 import websockets
 import json
 import threading
+from concurrent.futures import ThreadPoolExecutor
+import queue
 from datetime import datetime
 import base64
 
+try:
+    from turbojpeg import TurboJPEG, TJPF_RGB  # Optional: faster JPEG decode straight to RGB
+except ImportError:
+    TurboJPEG = None
+
+# Type tag prefixed to binary WebSocket messages (JSON is kept for control messages)
+BINARY_FRAME_TAG = 0x01
+
 # ============================================
-# ORIGINAL CLASSES (UNCHANGED)
+# CAMERA AND MEDIAPIPE HELPERS
 # ============================================
 
-class SignLanguageDataCollector:
-    """Original data collector - unchanged"""
-    
-    def __init__(self):
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
+_shared_hands = None
+
+def get_hands():
+    """MediaPipe Hands graph shared by the collector and recognizer (created lazily)"""
+    global _shared_hands
+    if _shared_hands is None:
+        _shared_hands = mp.solutions.hands.Hands(
             static_image_mode=False,
             max_num_hands=1,
             min_detection_confidence=0.7,
             min_tracking_confidence=0.5
         )
-        self.mp_drawing = mp.solutions.drawing_utils
+    return _shared_hands
+
+def close_hands():
+    """Release the shared MediaPipe graph, if it was created"""
+    global _shared_hands
+    if _shared_hands is not None:
+        _shared_hands.close()
+        _shared_hands = None
+
+def open_camera(index=0, width=800, height=600, fps=30):
+    """Open a webcam configured for low latency"""
+    # Native backends honour the FOURCC/FPS requests below more reliably
+    if sys.platform.startswith('win'):
+        cap = cv2.VideoCapture(index, cv2.CAP_DSHOW)
+    elif sys.platform.startswith('linux'):
+        cap = cv2.VideoCapture(index, cv2.CAP_V4L2)
+    else:
+        cap = cv2.VideoCapture(index)
+    if not cap.isOpened():
+        cap = cv2.VideoCapture(index)  # Fall back to the default backend
+    # Keep only the newest frame (no stale-frame lag) and request MJPG, which
+    # libjpeg-turbo decodes faster than unpacking YUY2. Both are backend-specific hints.
+    try:
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    except cv2.error:
+        pass
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    cap.set(cv2.CAP_PROP_FPS, fps)
+    
+    fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+    if fourcc and fourcc != cv2.VideoWriter_fourcc(*'MJPG'):
+        codec = fourcc.to_bytes(4, 'little').decode('ascii', 'replace')
+        print(f"💡 Camera delivers {codec} instead of MJPG")
+    return cap
+
+def _put_latest(q, item):
+    """Non-blocking put that replaces an item the consumer has not taken yet"""
+    try:
+        q.put_nowait(item)
+    except queue.Full:
+        try:
+            q.get_nowait()  # Drop the stale item
+        except queue.Empty:
+            pass
+        q.put_nowait(item)  # Single producer per queue, so there is room now
+
+class FrameGrabber:
+    """Grabs camera frames continuously, decodes only the ones asked for"""
+    
+    def __init__(self, cap, stop_event):
+        self.cap = cap
+        self.stop_event = stop_event
+        self.error = None  # Exception that ended the grab loop, if any
+        self._wanted = threading.Event()
+        self._frames = queue.Queue(maxsize=1)
+        self._thread = threading.Thread(target=self._grab_loop, daemon=True)
+    
+    def start(self):
+        self._thread.start()
+        return self
+    
+    def join(self):
+        self._thread.join()
+    
+    def _grab_loop(self):
+        # All VideoCapture calls stay on this thread. grab() keeps the driver
+        # queue drained, retrieve() (the decode) only runs when a frame is wanted.
+        try:
+            while not self.stop_event.is_set():
+                if not self.cap.grab():
+                    break
+                if self._wanted.is_set():
+                    self._wanted.clear()
+                    ret, frame = self.cap.retrieve()
+                    if ret:
+                        _put_latest(self._frames, frame)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.stop_event.set()  # Consumers stop waiting for frames
+    
+    def latest_frame(self, timeout=0.1):
+        """Next frame retrieved after this call, or None if none arrived within timeout"""
+        try:
+            self._frames.get_nowait()  # Left over from an earlier call that timed out
+        except queue.Empty:
+            pass
+        self._wanted.set()
+        try:
+            return self._frames.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+# ============================================
+# DATA COLLECTION AND TRAINING
+# ============================================
+
+class SignLanguageDataCollector:
+    """Collects labelled hand landmark samples from the webcam"""
+    
+    def __init__(self):
+        self.mp_hands = mp.solutions.hands
+        self.hands = get_hands()
+        # (start, end) landmark index pairs, drawn in one polylines call
+        self._hand_edges = np.array(sorted(self.mp_hands.HAND_CONNECTIONS), dtype=np.int32)
         self.collected_data = []
+        self._target_w = 480  # MediaPipe input width, 800x600 -> 480x360
+        self._resize_buf = None
+        self._rgb_buf = None  # Reused BGR->RGB conversion target
+        self.inference_interval = 2  # Run MediaPipe on at most every Nth frame
+        self._target_interval = 1 / 30.0  # Camera frame period
         
     def extract_hand_landmarks(self, image):
         """Extract 21 hand landmarks from image"""
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(image_rgb)
+        if image.shape[1] > self._target_w:
+            size = (self._target_w, int(image.shape[0] * self._target_w / image.shape[1]))
+            if self._resize_buf is None or self._resize_buf.shape[:2] != (size[1], size[0]):
+                self._resize_buf = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            # Landmarks are normalized [0, 1], so they still map onto the full-size frame
+            image = cv2.resize(image, size, dst=self._resize_buf, interpolation=cv2.INTER_AREA)
+        if self._rgb_buf is None or self._rgb_buf.shape != image.shape:
+            self._rgb_buf = np.empty(image.shape, dtype=np.uint8)
+        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=self._rgb_buf)
+        image_rgb.flags.writeable = False  # Lets MediaPipe skip its internal copy
+        try:
+            results = self.hands.process(image_rgb)
+        finally:
+            image_rgb.flags.writeable = True  # Buffer is reused for the next frame
         
         if results.multi_hand_landmarks:
             landmarks = results.multi_hand_landmarks[0]
-            landmark_list = []
-            for lm in landmarks.landmark:
-                landmark_list.extend([lm.x, lm.y, lm.z])
-            return landmark_list, landmarks
+            landmark_arr = np.empty(63, dtype=np.float32)
+            for i, lm in enumerate(landmarks.landmark):
+                landmark_arr[3*i] = lm.x
+                landmark_arr[3*i+1] = lm.y
+                landmark_arr[3*i+2] = lm.z
+            return landmark_arr, landmarks
         return None, None
     
+    def _landmark_loop(self, grabber, result_q, stop_event, capture_requested):
+        """Run MediaPipe on the newest camera frames"""
+        try:
+            frames_to_skip = 0
+            cached_result = None
+            while not stop_event.is_set():
+                frame = grabber.latest_frame()
+                if frame is None:
+                    continue
+                # Hand pose changes slowly, reuse the last result between inferences.
+                # Reused results are only for drawing, fresh marks landmarks of this frame.
+                # A pending capture skips the rest of the stride.
+                fresh = cached_result is None or frames_to_skip <= 0 or capture_requested.is_set()
+                if fresh:
+                    capture_requested.clear()
+                    t_start = time.perf_counter()
+                    cached_result = self.extract_hand_landmarks(frame)
+                    t_proc = time.perf_counter() - t_start
+                    # Slower inference -> skip more frames, so the display keeps camera pace
+                    frames_to_skip = max(self.inference_interval, int(t_proc / self._target_interval)) - 1
+                else:
+                    frames_to_skip -= 1
+                landmarks, landmarks_visual = cached_result
+                _put_latest(result_q, (frame, landmarks, landmarks_visual, fresh))
+        except Exception as e:
+            self._worker_error = e  # Re-raised by collect_samples once the camera is released
+        finally:
+            stop_event.set()  # Never leave the display loop waiting on a dead stage
+    
+    def _render_caption(self, width, sign, sample_count, samples_per_sign):
+        """Pre-render the caption text, returns (overlay, mask)"""
+        overlay = np.zeros((170, width, 3), dtype=np.uint8)
+        cv2.putText(overlay, f"Sign: {sign}", (20, 50),
+                   cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 255, 0), 3)
+        cv2.putText(overlay, f"Samples: {sample_count}/{samples_per_sign}", (20, 100),
+                   cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+        cv2.putText(overlay, "Press SPACE to capture", (20, 150),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 0), 2)
+        return overlay, overlay.any(axis=2, keepdims=True)
+    
     def collect_samples(self, sign_labels, samples_per_sign=30):
         """Collect training samples for each sign"""
-        cap = cv2.VideoCapture(0)
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 800)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 600)
+        cap = open_camera(0, 800, 600)
+        self._worker_error = None
+        
+        # Capture -> landmarks -> display pipeline, so FPS is bound by the
+        # slowest stage instead of their sum. Display stays on the main thread.
+        # Stages only hand over the newest frame: a slow stage drops frames
+        # instead of building up latency.
+        result_q = queue.Queue(maxsize=1)
+        stop_event = threading.Event()
+        capture_requested = threading.Event()
+        grabber = FrameGrabber(cap, stop_event).start()
+        landmark_worker = threading.Thread(
+            target=self._landmark_loop, args=(grabber, result_q, stop_event, capture_requested),
+            daemon=True)
+        landmark_worker.start()
         
         for sign in sign_labels:
+            if stop_event.is_set():
+                break
+            
             print(f"\n📋 Collecting samples for: {sign}")
             print("🎯 Position your hand and press SPACE to collect samples")
             print("⚠️  Press 'q' to skip this sign")
             
             sample_count = 0
+            caption = None
+            caption_key = None
+            capture_pending = False
             
             while sample_count < samples_per_sign:
-                ret, frame = cap.read()
-                if not ret:
-                    break
+                try:
+                    frame, landmarks, landmarks_visual, fresh = result_q.get(timeout=0.1)
+                except queue.Empty:
+                    if stop_event.is_set():  # Camera stopped delivering frames
+                        break
+                    continue
                 
-                # Create a copy for display
-                display_frame = frame.copy()
-                cv2.putText(display_frame, f"Sign: {sign}", (20, 50),
-                           cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 255, 0), 3)
-                cv2.putText(display_frame, f"Samples: {sample_count}/{samples_per_sign}", (20, 100),
-                           cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                cv2.putText(display_frame, "Press SPACE to capture", (20, 150),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 0), 2)
+                # The frame is owned by this stage now, draw on it directly
+                display_frame = frame
                 
-                landmarks, landmarks_visual = self.extract_hand_landmarks(frame)
+                # Caption text is only rasterized again when the sample counter changes
+                if caption_key != (display_frame.shape[1], sample_count):
+                    caption_key = (display_frame.shape[1], sample_count)
+                    caption = self._render_caption(
+                        display_frame.shape[1], sign, sample_count, samples_per_sign)
+                overlay, mask = caption
+                np.copyto(display_frame[:overlay.shape[0]], overlay, where=mask)
                 
-                if landmarks_visual:
-                    self.mp_drawing.draw_landmarks(
-                        display_frame, landmarks_visual, mp.solutions.hands.HAND_CONNECTIONS)
+                if landmarks is not None:
+                    h, w = display_frame.shape[:2]
+                    points = (landmarks.reshape(21, 3)[:, :2] * (w, h)).astype(np.int32)
+                    cv2.polylines(display_frame, list(points[self._hand_edges]), False, (255, 255, 255), 2)
+                    for x, y in points:
+                        cv2.circle(display_frame, (int(x), int(y)), 4, (0, 0, 255), -1)
                 
                 cv2.imshow('Data Collection', display_frame)
                 
                 key = cv2.waitKey(1) & 0xFF
-                if key == ord(' ') and landmarks:  # Space to capture
-                    self.collected_data.append({
-                        'landmarks': landmarks,
-                        'label': sign
-                    })
-                    sample_count += 1
-                    print(f"✅ Captured sample {sample_count}")
+                if key == ord(' '):  # Space to capture
+                    capture_pending = True
+                    capture_requested.set()  # Infer the next frame instead of waiting out the stride
                 elif key == ord('q'):  # Skip sign
                     print(f"⏭️ Skipped {sign}")
                     break
                 
+                # Only landmarks inferred on this very frame are stored,
+                # so a held key never saves the same cached row twice
+                if capture_pending and fresh:
+                    capture_pending = False
+                    if landmarks is not None:
+                        self.collected_data.append({
+                            'landmarks': landmarks,
+                            'label': sign
+                        })
+                        sample_count += 1
+                        print(f"✅ Captured sample {sample_count}")
+        
+        stop_event.set()
+        landmark_worker.join()
+        grabber.join()
         cap.release()
         cv2.destroyAllWindows()
-        self.hands.close()
+        for error in (grabber.error, self._worker_error):
+            if error is not None:
+                raise error
         return self.collected_data
 
 class SignLanguageClassifier:
-    """Original classifier - unchanged"""
+    """Random forest over normalized hand landmarks, with optional ONNX Runtime inference"""
     
     def __init__(self):
         self.model = RandomForestClassifier(
-            n_estimators=200,  
-            max_depth=15,      
+            n_estimators=50,  # Normalized features need a much smaller forest
+            max_depth=8,      
             min_samples_split=5,
             min_samples_leaf=2,
             random_state=42,
@@ -118,25 +333,33 @@ class SignLanguageClassifier:
         )
         self.label_to_idx = {}
         self.idx_to_label = {}
+        self._idx_to_label_arr = np.empty(0, dtype=object)
+        self.normalize_features = True  # Older pickles were trained on raw coordinates
+        self._trees = None  # Fitted forest trees for the fast predict path
+        self._sess = None  # Optional ONNX Runtime session (see load_onnx)
         
     def prepare_data(self, collected_data, sign_labels):
         """Prepare data for training"""
-        X, y = [], []
-        
-        for sample in collected_data:
-            if sample['label'] in sign_labels:
-                X.append(sample['landmarks'])
-                y.append(sample['label'])
+        # Older datasets store the label under 'sign' instead of 'label'
+        samples = [sample for sample in collected_data
+                   if sample.get('label', sample.get('sign')) in sign_labels]
+        labels = [sample.get('label', sample.get('sign')) for sample in samples]
         
         # Create label mappings
-        unique_labels = sorted(list(set(y)))
+        unique_labels = sorted(set(labels))
         self.label_to_idx = {label: idx for idx, label in enumerate(unique_labels)}
         self.idx_to_label = {idx: label for label, idx in self.label_to_idx.items()}
+        self._refresh_label_lookup()
         
-        # Convert labels to indices
-        y_encoded = [self.label_to_idx[label] for label in y]
+        # Build float32 arrays in one C-level call each (half the RAM of float64)
+        X = np.array([sample['landmarks'] for sample in samples], dtype=np.float32).reshape(-1, 63)
+        y = np.fromiter((self.label_to_idx[label] for label in labels),
+                        dtype=np.int16, count=len(labels))  # Class indices, few signs
         
-        return np.array(X), np.array(y_encoded)
+        if self.normalize_features:
+            X = self._normalize(X)
+        
+        return X, y
     
     def train(self, X, y):
         """Train the classifier"""
@@ -146,6 +369,7 @@ class SignLanguageClassifier:
         start_time = time.time()
         self.model.fit(X_train, y_train)
         training_time = time.time() - start_time
+        self._prepare_for_inference()
         
         y_pred = self.model.predict(X_test)
         accuracy = accuracy_score(y_test, y_pred)
@@ -156,34 +380,112 @@ class SignLanguageClassifier:
         
         return accuracy
     
+    @staticmethod
+    def _normalize(X):
+        """Translation and scale invariant landmarks for (N, 63) rows"""
+        points = X.reshape(-1, 21, 3)
+        points = points - points[:, 0:1, :]  # Wrist (landmark 0) at the origin
+        scale = np.linalg.norm(points[:, 9], axis=1)  # Wrist -> middle finger MCP
+        return (points / np.maximum(scale, 1e-6)[:, None, None]).reshape(-1, 63)
+    
+    def predict_batch(self, X):
+        """Class probabilities for (N, 63) landmark rows in one model call"""
+        X = np.asarray(X, dtype=np.float32).reshape(-1, 63)
+        if self.normalize_features:
+            X = self._normalize(X)
+        if self._sess is not None:
+            # float64 like scikit-learn, np.float32 confidences are not JSON serializable
+            return self._sess.run([self._proba_output], {self._input_name: X})[0].astype(np.float64)
+        if self._trees is not None:
+            # Average per-tree probabilities, skipping the forest's per-call input validation
+            proba = self._trees[0].predict_proba(X, check_input=False)
+            for tree in self._trees[1:]:
+                proba += tree.predict_proba(X, check_input=False)
+            return proba / len(self._trees)
+        return self.model.predict_proba(X)
+    
+    def _prepare_for_inference(self):
+        """Tune a fitted model for single-row, per-frame predictions"""
+        self.model.n_jobs = 1  # Thread dispatch costs more than it saves on one row
+        self._trees = self.model.estimators_ if isinstance(self.model, RandomForestClassifier) else None
+    
+    def _predict_proba(self, landmarks):
+        """Class probabilities for a single landmark vector"""
+        return self.predict_batch(landmarks)[0]
+    
     def predict(self, landmarks):
         """Predict sign from landmarks"""
-        proba = self.model.predict_proba([landmarks])[0]
+        proba = self._predict_proba(landmarks)
         class_idx = np.argmax(proba)
         confidence = proba[class_idx]
         return self.idx_to_label[class_idx], confidence
     
     def predict_top_k(self, landmarks, k=3):
         """Get top k predictions"""
-        proba = self.model.predict_proba([landmarks])[0]
-        top_indices = np.argsort(proba)[::-1][:k]
-        
-        predictions = []
-        for idx in top_indices:
-            predictions.append((self.idx_to_label[idx], proba[idx]))
-        
-        return predictions
+        return self._top_k_from_proba(self._predict_proba(landmarks), k)
+    
+    def predict_with_top_k(self, landmarks, k=3):
+        """Predict sign and top k predictions from a single forest pass"""
+        top_predictions = self._top_k_from_proba(self._predict_proba(landmarks), k)
+        return top_predictions[0], top_predictions
+    
+    def _top_k_from_proba(self, proba, k):
+        """Top k (label, probability) pairs without a full sort"""
+        k = min(k, len(proba))
+        top_indices = np.argpartition(proba, -k)[-k:]
+        top_indices = top_indices[np.argsort(-proba[top_indices])]
+        return list(zip(self._idx_to_label_arr[top_indices], proba[top_indices]))
+    
+    def _refresh_label_lookup(self):
+        """Rebuild the index -> label array used for vectorized decoding"""
+        self._idx_to_label_arr = np.array(
+            [self.idx_to_label[i] for i in range(len(self.idx_to_label))], dtype=object)
     
     def save_model(self, filename):
         """Save trained model"""
         model_data = {
             'model': self.model,
             'label_to_idx': self.label_to_idx,
-            'idx_to_label': self.idx_to_label
+            'idx_to_label': self.idx_to_label,
+            'normalize_features': self.normalize_features
         }
         with open(filename, 'wb') as f:
             pickle.dump(model_data, f)
         print(f"💾 Model saved to {filename}")
+        
+        # Compiled copy of the forest next to the pickle, used by load_model
+        try:
+            self.export_onnx(os.path.splitext(filename)[0] + '.onnx')
+        except ImportError:
+            print("💡 Install skl2onnx + onnxruntime for faster inference")
+        except Exception as e:
+            print(f"⚠️ ONNX export failed ({e}), using scikit-learn inference")
+    
+    def export_onnx(self, filename):
+        """Export trained model to ONNX (requires skl2onnx)"""
+        from skl2onnx import convert_sklearn
+        from skl2onnx.common.data_types import FloatTensorType
+        
+        onnx_model = convert_sklearn(
+            self.model,
+            initial_types=[('input', FloatTensorType([None, 63]))],
+            options={id(self.model): {'zipmap': False}}  # Plain probability tensor
+        )
+        with open(filename, 'wb') as f:
+            f.write(onnx_model.SerializeToString())
+        print(f"💾 ONNX model saved to {filename}")
+    
+    def load_onnx(self, filename):
+        """Run inference through ONNX Runtime (requires onnxruntime)"""
+        import onnxruntime as ort
+        
+        sess_options = ort.SessionOptions()
+        sess_options.intra_op_num_threads = 1  # Single frame, small model
+        self._sess = ort.InferenceSession(
+            filename, sess_options=sess_options, providers=['CPUExecutionProvider'])
+        self._input_name = self._sess.get_inputs()[0].name
+        self._proba_output = self._sess.get_outputs()[1].name  # [label, probabilities]
+        print(f"⚡ ONNX Runtime inference enabled from {filename}")
     
     def load_model(self, filename):
         """Load trained model"""
@@ -193,9 +495,22 @@ class SignLanguageClassifier:
         self.model = model_data['model']
         self.label_to_idx = model_data['label_to_idx']
         self.idx_to_label = model_data['idx_to_label']
+        self._refresh_label_lookup()
+        self.normalize_features = model_data.get('normalize_features', False)
+        self._prepare_for_inference()
+        self._sess = None
         
         print(f"📦 Model loaded from {filename}")
         print(f"🎯 Available signs: {len(self.label_to_idx)}")
+        
+        # Only use the ONNX export if it is at least as new as the pickle
+        onnx_file = os.path.splitext(filename)[0] + '.onnx'
+        if (os.path.exists(onnx_file) and
+                os.path.getmtime(onnx_file) >= os.path.getmtime(filename)):
+            try:
+                self.load_onnx(onnx_file)
+            except ImportError:
+                print("💡 onnxruntime not installed, using scikit-learn inference")
 
 # ============================================
 # WEB-FED RECOGNIZER CLASS
@@ -207,22 +522,42 @@ class WebFedSignLanguageRecognizer:
     def __init__(self, classifier):
         self.classifier = classifier
         self.mp_hands = mp.solutions.hands
-        # EXACT SAME SETTINGS as working version
-        self.hands = self.mp_hands.Hands(
-            static_image_mode=False,
-            max_num_hands=1,
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.5
-        )
+        # EXACT SAME SETTINGS as working version (shared graph, see get_hands)
+        self.hands = get_hands()
         self.mp_drawing = mp.solutions.drawing_utils
         
-        # EXACT SAME smoothing logic
-        self.prediction_history = deque(maxlen=20)
-        self.recognized_text = []
+        # Smoothing ring buffer of recent class indices (-1 = empty slot)
+        # plus a rolling per-class vote count
+        self.hist_idx = np.full(5, -1, np.int16)
+        self._vote_counts = np.zeros(len(classifier.idx_to_label), np.int32)
+        self.hist_pos = 0
+        self.hist_count = 0
+        self.recognized_text = deque(maxlen=200)  # Bounded, sent with every frame result
+        self.session_words = []  # Full transcript for counts, stats and the final printout
+        self._text_dirty = True  # Rebuild the cached text snapshot on next use
+        self._text_cache = None
         self.last_sign = None
-        self.last_sign_time = time.time()
+        self.last_sign_time = time.perf_counter()
         self.confidence_threshold = 0.7
         
+        # Downscale wide frames before MediaPipe (its hand model runs at 224x224)
+        self._target_w = 640
+        self._resize_buf = None
+        self._rgb_buf = None  # Reused BGR->RGB conversion target
+        self._landmark_buf = np.empty(63, dtype=np.float32)  # Overwritten every frame
+        
+        # libjpeg-turbo decoder for web frames (falls back to cv2.imdecode)
+        self._tj = None
+        if TurboJPEG is not None:
+            try:
+                self._tj = TurboJPEG()
+            except RuntimeError:
+                print("💡 libturbojpeg not found, using OpenCV JPEG decoding")
+        
+        # MediaPipe/classifier work runs off the event loop (MediaPipe releases
+        # the GIL). A single worker keeps frames and text updates in order.
+        self._infer_pool = ThreadPoolExecutor(max_workers=1)
+        
         # WebSocket communication
         self.websocket_clients = set()
         self.processing_stats = {
@@ -231,34 +566,106 @@ class WebFedSignLanguageRecognizer:
             'start_time': time.time()
         }
         
+    def text_snapshot(self):
+        """Recognized words and joined text, rebuilt only after the text changes"""
+        if self._text_dirty:
+            self._text_cache = (list(self.recognized_text), ' '.join(self.recognized_text))
+            self._text_dirty = False
+        return self._text_cache
+    
+    def clear_text(self):
+        """Clear recognized text and smoothing state (run on the inference worker)"""
+        self.recognized_text.clear()
+        self.session_words.clear()
+        self._text_dirty = True
+        self.clear_history()
+        self.last_sign = None
+        self.last_sign_time = time.perf_counter()
+    
+    def clear_history(self):
+        """Reset the smoothing ring buffer and vote counts"""
+        self.hist_idx.fill(-1)
+        self._vote_counts.fill(0)
+        self.hist_pos = 0
+        self.hist_count = 0
+    
+    def _downscale(self, image):
+        """Shrink frames wider than the MediaPipe target width"""
+        if image.shape[1] <= self._target_w:
+            return image
+        scale = self._target_w / image.shape[1]
+        size = (self._target_w, int(image.shape[0] * scale))
+        if self._resize_buf is None or self._resize_buf.shape[:2] != (size[1], size[0]):
+            self._resize_buf = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        # Landmarks are normalized [0, 1], so no rescaling is needed afterwards
+        return cv2.resize(image, size, dst=self._resize_buf, interpolation=cv2.INTER_AREA)
+    
+    def _decode_jpeg_rgb(self, frame_bytes):
+        """Decode JPEG straight to RGB, downscaling during the IDCT"""
+        try:
+            width = self._tj.decode_header(frame_bytes)[0]
+            scaling_factor = (1, 1)
+            for factor in ((1, 8), (1, 4), (1, 2)):
+                if width * factor[0] // factor[1] >= self._target_w:
+                    scaling_factor = factor
+                    break
+            return self._tj.decode(frame_bytes, pixel_format=TJPF_RGB,
+                                   scaling_factor=scaling_factor)
+        except OSError:
+            return None  # Not a JPEG (e.g. PNG frame), let OpenCV handle it
+    
     def extract_landmarks(self, image):
-        """EXACT SAME as working version"""
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(image_rgb)
+        """Downscale a BGR frame and run MediaPipe, the returned array is reused - don't keep it"""
+        image = self._downscale(image)
+        if self._rgb_buf is None or self._rgb_buf.shape != image.shape:
+            self._rgb_buf = np.empty(image.shape, dtype=np.uint8)
+        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=self._rgb_buf)
+        return self._landmarks_from_rgb(image_rgb)
+    
+    def _landmarks_from_rgb(self, image_rgb):
+        """Run MediaPipe on an RGB frame and flatten the first hand into the reused _landmark_buf"""
+        image_rgb.flags.writeable = False  # Lets MediaPipe skip its internal copy
+        try:
+            results = self.hands.process(image_rgb)
+        finally:
+            image_rgb.flags.writeable = True  # May be a reused resize/RGB buffer
         
         if results.multi_hand_landmarks:
             landmarks = results.multi_hand_landmarks[0]
-            landmark_list = []
-            for lm in landmarks.landmark:
-                landmark_list.extend([lm.x, lm.y, lm.z])
-            return landmark_list, landmarks
+            landmark_arr = self._landmark_buf  # Read-only for callers, reused next frame
+            for i, lm in enumerate(landmarks.landmark):
+                landmark_arr[3*i] = lm.x
+                landmark_arr[3*i+1] = lm.y
+                landmark_arr[3*i+2] = lm.z
+            return landmark_arr, landmarks
         return None, None
 
     def process_frame_from_web(self, frame_data):
         """Process a frame received from the website"""
         try:
-            # Decode base64 frame
-            frame_bytes = base64.b64decode(frame_data.split(',')[1])
-            frame_array = np.frombuffer(frame_bytes, dtype=np.uint8)
-            frame = cv2.imdecode(frame_array, cv2.IMREAD_COLOR)
+            if isinstance(frame_data, str):
+                # Decode base64 data URL frame
+                frame_bytes = base64.b64decode(frame_data.split(',')[1])
+            else:
+                # Raw JPEG bytes from a binary message
+                frame_bytes = frame_data
             
-            if frame is None:
-                return None
+            # TurboJPEG decodes directly to RGB, skipping the BGR->RGB pass
+            frame_rgb = self._decode_jpeg_rgb(frame_bytes) if self._tj is not None else None
+            if frame_rgb is None:
+                frame_array = np.frombuffer(frame_bytes, dtype=np.uint8)
+                frame = cv2.imdecode(frame_array, cv2.IMREAD_COLOR)
+                
+                if frame is None:
+                    return None
             
             self.processing_stats['frames_processed'] += 1
             
             # Extract landmarks from frame
-            landmarks, landmarks_visual = self.extract_landmarks(frame)
+            if frame_rgb is not None:
+                landmarks, landmarks_visual = self._landmarks_from_rgb(self._downscale(frame_rgb))
+            else:
+                landmarks, landmarks_visual = self.extract_landmarks(frame)
             
             hand_detected = landmarks is not None
             current_sign = None
@@ -268,8 +675,8 @@ class WebFedSignLanguageRecognizer:
             
             if hand_detected:
                 # Get prediction
-                sign, conf = self.classifier.predict(landmarks)
-                top_predictions = self.classifier.predict_top_k(landmarks, k=5)  # Get top 5 for debugging
+                # Single forest pass for both the prediction and the top 5 (debugging)
+                (sign, conf), top_predictions = self.classifier.predict_with_top_k(landmarks, k=5)
                 
                 # DEBUG: Print top predictions to console
                 print(f"🔍 DEBUG - Top predictions:")
@@ -284,35 +691,40 @@ class WebFedSignLanguageRecognizer:
                 print(f"🎯 Selected: {detected_sign} (Confidence: {conf:.3f})")
                 
                 # Apply smoothing but accept ANY confidence level
-                self.prediction_history.append((sign, conf))
+                evicted = self.hist_idx[self.hist_pos]
+                if evicted >= 0:
+                    self._vote_counts[evicted] -= 1
+                idx = self.classifier.label_to_idx[sign]
+                self.hist_idx[self.hist_pos] = idx
+                self._vote_counts[idx] += 1
+                self.hist_pos = (self.hist_pos + 1) % len(self.hist_idx)  # Last 5 predictions
+                self.hist_count += 1
                 
-                if len(self.prediction_history) >= 3:  # Reduced history for faster response
+                if self.hist_count >= 3:  # Reduced history for faster response
                     # Get most common recent prediction (no confidence filtering)
-                    recent_predictions = [pred for pred, conf_val in list(self.prediction_history)[-5:]]  # Last 5 predictions
+                    stable_sign = self.classifier.idx_to_label[int(self._vote_counts.argmax())]
                     
-                    if recent_predictions:
-                        most_common = Counter(recent_predictions).most_common(1)
-                        if most_common:
-                            stable_sign = most_common[0][0]
-                            
-                            # Add to text if stable and new (reduced time filter)
-                            current_time = time.time()
-                            if (stable_sign != self.last_sign and 
-                                current_time - self.last_sign_time > 1.0):  # Reduced from 1.8 to 1.0 seconds
-                                self.recognized_text.append(stable_sign)
-                                self.last_sign = stable_sign
-                                self.last_sign_time = current_time
-                                new_text_added = True
-                                self.processing_stats['detections_made'] += 1
-                                print(f"✅ Added: {stable_sign} (Confidence: {conf:.2f})")
+                    # Add to text if stable and new (reduced time filter)
+                    current_time = time.perf_counter()
+                    if (stable_sign != self.last_sign and 
+                        current_time - self.last_sign_time > 1.0):  # Reduced from 1.8 to 1.0 seconds
+                        self.recognized_text.append(stable_sign)
+                        self.session_words.append(stable_sign)
+                        self._text_dirty = True
+                        self.last_sign = stable_sign
+                        self.last_sign_time = current_time
+                        new_text_added = True
+                        self.processing_stats['detections_made'] += 1
+                        print(f"✅ Added: {stable_sign} (Confidence: {conf:.2f})")
             
             # Return detection results
+            recognized_text, full_text = self.text_snapshot()
             return {
                 'hand_detected': hand_detected,
                 'current_sign': current_sign,
                 'confidence': confidence,
-                'recognized_text': self.recognized_text.copy(),
-                'full_text': ' '.join(self.recognized_text),
+                'recognized_text': recognized_text,
+                'full_text': full_text,
                 'new_text_added': new_text_added,
                 'top_predictions': [(sign, float(conf)) for sign, conf in top_predictions],
                 'processing_stats': self.processing_stats.copy()
@@ -326,6 +738,7 @@ class WebFedSignLanguageRecognizer:
         """Handle WebSocket connections from web interface"""
         print(f"🔗 Web interface connected from {websocket.remote_address}")
         self.websocket_clients.add(websocket)
+        loop = asyncio.get_running_loop()
         
         try:
             # Send initial status
@@ -335,17 +748,25 @@ class WebFedSignLanguageRecognizer:
                 'available_signs': list(self.classifier.label_to_idx.keys()),
                 'total_signs': len(self.classifier.label_to_idx),
                 'message': 'Connected to Web-Fed Sign Translator',
-                'recognized_text': self.recognized_text.copy()
+                'recognized_text': list(self.recognized_text)
             }))
             
             # Handle incoming messages
             async for message in websocket:
                 try:
-                    data = json.loads(message)
+                    if isinstance(message, (bytes, bytearray)):
+                        # Binary frame: skip JSON parsing of the large payload
+                        if not message or message[0] != BINARY_FRAME_TAG:
+                            print("⚠️ Unknown binary message type from web interface")
+                            continue
+                        data = {'type': 'frame', 'frame_data': memoryview(message)[1:]}
+                    else:
+                        data = json.loads(message)
                     
                     if data.get('type') == 'frame':
-                        # Process the frame
-                        result = self.process_frame_from_web(data.get('frame_data'))
+                        # Process the frame on the inference worker, keeping the loop free
+                        result = await loop.run_in_executor(
+                            self._infer_pool, self.process_frame_from_web, data.get('frame_data'))
                         
                         if result:
                             # Send back detection results
@@ -357,10 +778,7 @@ class WebFedSignLanguageRecognizer:
                     
                     elif data.get('type') == 'clear_text':
                         # Clear recognized text
-                        self.recognized_text.clear()
-                        self.prediction_history.clear()
-                        self.last_sign = None
-                        self.last_sign_time = time.time()
+                        await loop.run_in_executor(self._infer_pool, self.clear_text)
                         print("🗑️ Text cleared by web interface")
                         
                         await websocket.send(json.dumps({
@@ -379,7 +797,7 @@ class WebFedSignLanguageRecognizer:
                             'processing_stats': self.processing_stats.copy(),
                             'runtime_seconds': runtime,
                             'fps': fps,
-                            'total_words': len(self.recognized_text)
+                            'total_words': len(self.session_words)
                         }))
                         
                 except json.JSONDecodeError:
@@ -395,54 +813,93 @@ class WebFedSignLanguageRecognizer:
             print(f"🔌 Web interface disconnected")
             self.websocket_clients.discard(websocket)
 
-    def start_websocket_server(self):
-        """Start WebSocket server"""
-        async def run_server():
-            print(f"🌐 Starting Web-Fed WebSocket server on ws://localhost:8765")
-            print(f"🔗 Web interface can now connect to send frames and receive detection results")
-            
-            server = await websockets.serve(
-                self.websocket_handler,
-                "0.0.0.0",
-                8765,  # WebSocket port
-                ping_interval=30,
-                ping_timeout=20,
-                max_size=10_000_000,  # 10MB max message size for large images
-                max_queue=32,
-                compression=None  # Disable compression for speed
-            )
-            
-            print("✅ WebSocket server started successfully!")
-            print("📋 Commands:")
-            print("  - Send frames: {'type': 'frame', 'frame_data': 'data:image/jpeg;base64,...'}")
-            print("  - Clear text: {'type': 'clear_text'}")
-            print("  - Get stats: {'type': 'get_stats'}")
-            
-            await server.wait_closed()
+    def handle_console_command(self, user_input):
+        """Handle a keyboard command, returns False when asked to quit"""
+        if user_input == 'q':
+            print("🛑 Shutting down...")
+            return False
+        elif user_input == 'c':
+            self._infer_pool.submit(self.clear_text)
+            print("🗑️ Text cleared")
+        elif user_input == 's':
+            runtime = time.time() - self.processing_stats['start_time']
+            fps = self.processing_stats['frames_processed'] / runtime if runtime > 0 else 0
+            print(f"\n📊 PROCESSING STATISTICS:")
+            print(f"  🎥 Frames processed: {self.processing_stats['frames_processed']}")
+            print(f"  🎯 Detections made: {self.processing_stats['detections_made']}")
+            print(f"  ⏱️  Runtime: {runtime:.1f} seconds")
+            print(f"  📈 FPS: {fps:.1f}")
+            print(f"  👥 Connected clients: {len(self.websocket_clients)}")
+            print(f"  📝 Recognized words: {len(self.session_words)}")
+            if self.session_words:
+                print(f"  📜 Current text: {' '.join(self.session_words)}")
+        return True
+
+    async def serve(self):
+        """Run the WebSocket server and keyboard commands on a single event loop"""
+        loop = asyncio.get_running_loop()
+        stop_event = asyncio.Event()
         
-        # Run server in background thread
-        def run_loop():
-            asyncio.set_event_loop(asyncio.new_event_loop())
-            loop = asyncio.get_event_loop()
-            loop.run_until_complete(run_server())
+        print(f"🌐 Starting Web-Fed WebSocket server on ws://localhost:8765")
+        print(f"🔗 Web interface can now connect to send frames and receive detection results")
         
-        server_thread = threading.Thread(target=run_loop, daemon=True)
-        server_thread.start()
-        time.sleep(2)  # Give server more time to start
+        server = await websockets.serve(
+            self.websocket_handler,
+            "0.0.0.0",
+            8765,  # WebSocket port
+            ping_interval=30,
+            ping_timeout=20,
+            max_size=10_000_000,  # 10MB max message size for large images
+            max_queue=32,
+            compression=None  # Disable compression for speed
+        )
         
-        return server_thread
-
-    def run_web_fed_recognition(self):
-        """Run the web-fed recognition system"""
-        # Start WebSocket server
-        self.start_websocket_server()
+        print("✅ WebSocket server started successfully!")
+        self.print_status()
+        
+        def on_line(line):
+            # Empty string means stdin hit EOF
+            if not line or not self.handle_console_command(line.strip().lower()):
+                stop_event.set()
+        
+        def on_interrupt():
+            print("\n🛑 Shutting down...")
+            stop_event.set()
+        
+        stdin_fd = sys.stdin.fileno()
+        try:
+            loop.add_reader(stdin_fd, lambda: on_line(sys.stdin.readline()))
+            reader_added = True
+        except NotImplementedError:
+            # Windows Proactor loop cannot watch stdin, read it from a daemon thread
+            def read_stdin():
+                for line in sys.stdin:
+                    loop.call_soon_threadsafe(on_line, line)
+                loop.call_soon_threadsafe(on_line, '')
+            threading.Thread(target=read_stdin, daemon=True).start()
+            reader_added = False
         
+        try:
+            loop.add_signal_handler(signal.SIGINT, on_interrupt)
+        except NotImplementedError:
+            pass  # Windows: Ctrl+C still raises KeyboardInterrupt
+        
+        try:
+            await stop_event.wait()
+        finally:
+            if reader_added:
+                loop.remove_reader(stdin_fd)
+            server.close()
+            await server.wait_closed()
+
+    def print_status(self):
+        """Print available signs, server status and commands"""
         print("\n" + "="*60)
         print("🎥 WEB-FED SIGN LANGUAGE RECOGNITION")
         print("="*60)
         print(f"\n🎯 Available Signs ({len(self.classifier.label_to_idx)}):")
-        signs = list(self.classifier.label_to_idx.keys())
-        for i, sign in enumerate(signs, 1):
+        sign_menu = list(self.classifier.label_to_idx)
+        for i, sign in enumerate(sign_menu, 1):
             if i % 6 == 1:
                 print()  # New line every 6 signs
             print(f"  {sign:<12}", end="")
@@ -451,10 +908,11 @@ class WebFedSignLanguageRecognizer:
         print(f"  🔗 URL: ws://localhost:8765")
         print(f"  📊 Confidence Threshold: DISABLED (always use top prediction)")
         print(f"  🎯 Temporal Filter: 1.0 seconds")
-        print(f"  📝 Total Recognized Words: {len(self.recognized_text)}")
+        print(f"  📝 Total Recognized Words: {len(self.session_words)}")
         
         print(f"\n📋 Web Interface Commands:")
         print(f"  🎥 Send frame: {{'type': 'frame', 'frame_data': '...'}} ")
+        print(f"  🎥 Send binary frame: 0x01 + raw JPEG bytes")
         print(f"  🗑️ Clear text: {{'type': 'clear_text'}}")
         print(f"  📊 Get stats: {{'type': 'get_stats'}}")
         
@@ -463,43 +921,30 @@ class WebFedSignLanguageRecognizer:
         print(f"  ⌨️  Press 's' + Enter to show statistics")
         print(f"  ⌨️  Press 'q' + Enter to quit")
         print("-" * 60)
+
+    def run_web_fed_recognition(self):
+        """Run the web-fed recognition system"""
+        try:
+            import uvloop  # libuv-backed loop (Linux/macOS)
+            loop = uvloop.new_event_loop()
+        except ImportError:
+            loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
         
-        # Keep server running and handle keyboard input
+        # Server and keyboard commands share the main thread's event loop
         try:
-            while True:
-                user_input = input().strip().lower()
-                
-                if user_input == 'q':
-                    print("🛑 Shutting down...")
-                    break
-                elif user_input == 'c':
-                    self.recognized_text.clear()
-                    self.prediction_history.clear()
-                    self.last_sign = None
-                    self.last_sign_time = time.time()
-                    print("🗑️ Text cleared")
-                elif user_input == 's':
-                    runtime = time.time() - self.processing_stats['start_time']
-                    fps = self.processing_stats['frames_processed'] / runtime if runtime > 0 else 0
-                    print(f"\n📊 PROCESSING STATISTICS:")
-                    print(f"  🎥 Frames processed: {self.processing_stats['frames_processed']}")
-                    print(f"  🎯 Detections made: {self.processing_stats['detections_made']}")
-                    print(f"  ⏱️  Runtime: {runtime:.1f} seconds")
-                    print(f"  📈 FPS: {fps:.1f}")
-                    print(f"  👥 Connected clients: {len(self.websocket_clients)}")
-                    print(f"  📝 Recognized words: {len(self.recognized_text)}")
-                    if self.recognized_text:
-                        print(f"  📜 Current text: {' '.join(self.recognized_text)}")
-                
+            loop.run_until_complete(self.serve())
         except KeyboardInterrupt:
             print("\n🛑 Shutting down...")
+        finally:
+            loop.close()
         
-        self.hands.close()
+        self._infer_pool.shutdown(wait=True)
         
-        if self.recognized_text:
+        if self.session_words:
             print("\n" + "="*60)
             print("📝 FINAL RECOGNIZED TEXT:")
-            print(' '.join(self.recognized_text))
+            print(' '.join(self.session_words))
             print("="*60)
 
 # ============================================
@@ -600,4 +1045,6 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"\n❌ Error: {str(e)}")
         import traceback
-        traceback.print_exc()
\ No newline at end of file
+        traceback.print_exc()
+    finally:
+        close_hands()
\ No newline at end of file